@@ -1,16 +1,22 @@
 # alliance_mcp_server.py
-import uuid
-import json
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-
+import asyncio
+import bisect
+import os
+import random
+import secrets
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set
+
+import orjson
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
 # ---------- Game State ----------
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     from_player: str
     to_player: str
@@ -18,29 +24,31 @@ class Message:
     round_number: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     name: str
     private_id: str
     score: int = 0
-    supported_you_last_round: set = field(default_factory=set)
 
 
 class GameState:
     def __init__(self):
         self.players_by_name: Dict[str, Player] = {}
         self.players_by_private: Dict[str, Player] = {}
+        # Names in scoreboard order, kept sorted as players register
+        self.sorted_player_names: List[str] = []
         self.current_round: int = 1
         # For the *current* round: name -> name they support
         self.current_supports: Dict[str, str] = {}
-        self.messages: List[Message] = []
+        # Reverse index of current_supports: name -> names supporting them
+        self.current_supporters_of: Dict[str, Set[str]] = defaultdict(set)
+        # Snapshot of current_supporters_of taken when the last round was scored
+        self.last_round_supporters_of: Dict[str, FrozenSet[str]] = {}
+        # For the *current* round: recipient name -> messages sent to them
+        self.inbox: Dict[str, List[Message]] = defaultdict(list)
 
     # ----- Core helpers -----
 
-    def _ensure_player_name_unique(self, name: str):
-        if name in self.players_by_name:
-            raise ValueError(f"Player '{name}' already exists")
-
     def _get_player_by_private(self, private_id: str) -> Player:
         player = self.players_by_private.get(private_id)
         if not player:
@@ -56,11 +64,13 @@ class GameState:
     # ----- Tools implementation -----
 
     def register_player(self, player_name: str) -> Dict:
-        self._ensure_player_name_unique(player_name)
-        private_id = str(uuid.uuid4())
+        private_id = secrets.token_hex(16)
         player = Player(name=player_name, private_id=private_id)
-        self.players_by_name[player_name] = player
+        # Single probe that both checks the name and claims it
+        if self.players_by_name.setdefault(player_name, player) is not player:
+            raise ValueError(f"Player '{player_name}' already exists")
         self.players_by_private[private_id] = player
+        bisect.insort(self.sorted_player_names, player_name)
         return self._build_status(player)
 
     def get_status(self, private_id: str) -> Dict:
@@ -76,14 +86,13 @@ class GameState:
         sender = self._get_player_by_private(private_id)
         recipient = self._get_player_by_name(recipient_player_name)
 
-        self.messages.append(
-            Message(
-                from_player=sender.name,
-                to_player=recipient.name,
-                message=message,
-                round_number=self.current_round,
-            )
+        msg = Message(
+            from_player=sender.name,
+            to_player=recipient.name,
+            message=message,
+            round_number=self.current_round,
         )
+        self.inbox[recipient.name].append(msg)
 
         # Return sender's status
         return self._build_status(sender)
@@ -96,9 +105,44 @@ class GameState:
 
         self._get_player_by_name(player_to_support)  # validate exists
 
-        self.current_supports[supporter.name] = player_to_support
+        self._set_support(supporter.name, player_to_support)
         return self._build_status(supporter)
 
+    def take_turn_auto(self, private_id: str) -> Dict:
+        """
+        Play a whole turn server-side: support the highest-scoring player who
+        supported you last round, else the highest-scoring other player, with
+        ties broken at random. This fuses get_status, the choice and
+        register_support into one call.
+        """
+        player = self._get_player_by_private(private_id)
+        allies = self.last_round_supporters_of.get(player.name, frozenset())
+
+        best: List[str] = []
+        best_key = None
+        for name in self.sorted_player_names:
+            if name == player.name:
+                continue
+            key = (name in allies, self.players_by_name[name].score)
+            if best_key is None or key > best_key:
+                best_key = key
+                best = [name]
+            elif key == best_key:
+                best.append(name)
+
+        chose = None
+        if best:
+            chose = best[0] if len(best) == 1 else best[_tie_rng.randrange(len(best))]
+            self._set_support(player.name, chose)
+        return {"status": self._build_status(player), "chose": chose}
+
+    def _set_support(self, supporter_name: str, target: str) -> None:
+        old_target = self.current_supports.get(supporter_name)
+        if old_target is not None:
+            self.current_supporters_of[old_target].discard(supporter_name)
+        self.current_supporters_of[target].add(supporter_name)
+        self.current_supports[supporter_name] = target
+
     # ----- Round logic (admin method) -----
 
     def advance_round(self) -> Dict:
@@ -107,59 +151,54 @@ class GameState:
         then move to the next round. Returns a scoreboard for the round.
         """
         prev_round = self.current_round
-        supports = dict(self.current_supports)  # copy
+        supports = self.current_supports
+        supporters_of = self.current_supporters_of
 
-        # supporters_of[target] = [supporter1, supporter2, ...]
-        supporters_of: Dict[str, List[str]] = {
-            name: [] for name in self.players_by_name.keys()
-        }
+        # All four rules accumulate into per-player deltas: one pass over this
+        # round's supports, then one write-back per player.
+        score_delta = dict.fromkeys(self.players_by_name, 0)
         for supporter, target in supports.items():
-            if target in supporters_of:
-                supporters_of[target].append(supporter)
-
-        # Clear previous "supported_you_last_round"
-        for p in self.players_by_name.values():
-            p.supported_you_last_round = set()
-
-        # 1. SUPPORTS RECEIVED: +1 per supporter
-        for target, supporters in supporters_of.items():
-            if supporters:
-                self.players_by_name[target].score += len(supporters)
-                self.players_by_name[target].supported_you_last_round = set(supporters)
-
-        # 2. MUTUAL ALLIANCE BONUS: +2 if A supports B and B supports A
-        for supporter, target in supports.items():
-            # only count each pair once (supporter < target lexicographically)
-            if supporter < target and supports.get(target) == supporter:
-                self.players_by_name[supporter].score += 2
-                self.players_by_name[target].score += 2
-
-        # 3. UNRECIPROCATED PENALTY: -1 if you support someone who doesn't support you
-        for supporter, target in supports.items():
-            if supports.get(target) != supporter:
-                self.players_by_name[supporter].score -= 1
+            # 1. SUPPORTS RECEIVED: +1 per supporter
+            score_delta[target] += 1
+            if supports.get(target) == supporter:
+                # 2. MUTUAL ALLIANCE BONUS: +2 if A supports B and B supports A
+                # only count each pair once (supporter < target lexicographically)
+                if supporter < target:
+                    score_delta[supporter] += 2
+                    score_delta[target] += 2
+            else:
+                # 3. UNRECIPROCATED PENALTY: -1 if you support someone who doesn't support you
+                score_delta[supporter] -= 1
 
-        # 4. NO SUPPORT PENALTY: -1 if you don't support anyone
         for name, player in self.players_by_name.items():
+            # 4. NO SUPPORT PENALTY: -1 if you don't support anyone
             if name not in supports:
-                player.score -= 1
+                score_delta[name] -= 1
+            player.score += score_delta[name]
 
         # Build scoreboard
         scores_list = []
-        for name in sorted(self.players_by_name.keys()):
+        for name in self.sorted_player_names:
             player = self.players_by_name[name]
             scores_list.append(
                 {
                     "player_name": name,
                     "score": player.score,
                     "supported": supports.get(name),
-                    "supporters_this_round": supporters_of.get(name, []),
+                    "supporters_this_round": sorted(supporters_of.get(name, ())),
                 }
             )
 
         # Advance round
+        self.last_round_supporters_of = {
+            target: frozenset(supporters)
+            for target, supporters in supporters_of.items()
+            if supporters
+        }
         self.current_round += 1
         self.current_supports = {}
+        self.current_supporters_of = defaultdict(set)
+        self.inbox.clear()
 
         return {
             "round_number": prev_round,
@@ -169,6 +208,7 @@ class GameState:
     # ----- Status builder -----
 
     def _build_status(self, player: Player) -> Dict:
+        supporters = self.last_round_supporters_of.get(player.name, frozenset())
         other_players = []
         for other_name, other in self.players_by_name.items():
             if other_name == player.name:
@@ -177,15 +217,13 @@ class GameState:
                 {
                     "player_name": other.name,
                     "score": other.score,
-                    "supported_you_last_round": other.name
-                    in player.supported_you_last_round,
+                    "supported_you_last_round": other.name in supporters,
                 }
             )
 
         messages_this_round = [
             {"from": m.from_player, "message": m.message}
-            for m in self.messages
-            if m.to_player == player.name and m.round_number == self.current_round
+            for m in self.inbox.get(player.name, ())
         ]
 
         return {
@@ -200,10 +238,103 @@ class GameState:
 
 
 game_state = GameState()
+# Tie-breaks for take_turn_auto
+_tie_rng = random.Random()
+
+# All access to game_state goes through this lock. The server runs as a single
+# uvicorn worker, so an asyncio.Lock is enough: every tool that mutates the
+# game (register_player, send_message, register_support, advance_round) MUST
+# do so while holding it, and readers (get_status) take it too so they never
+# observe a half-finished round.
+game_lock = asyncio.Lock()
+
+# Scoring ticks are funneled through a single worker task: game/advance_round
+# posts a future onto this queue and awaits it, so rounds are scored strictly
+# one after another even if several admin calls arrive at once.
+round_queue: "asyncio.Queue[asyncio.Future]" = asyncio.Queue()
+
+# Signalled (under game_lock) each time a round has been scored, so the
+# wait_next_round tool can long-poll instead of clients sleeping blindly.
+round_advanced = asyncio.Condition(game_lock)
+
+WAIT_NEXT_ROUND_DEFAULT_TIMEOUT = 25.0
+WAIT_NEXT_ROUND_MAX_TIMEOUT = 60.0
+
+
+async def _round_worker():
+    while True:
+        future = await round_queue.get()
+        try:
+            async with game_lock:
+                scoreboard = game_state.advance_round()
+                round_advanced.notify_all()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(scoreboard)
+        finally:
+            round_queue.task_done()
+
+
+async def _advance_round() -> Dict:
+    future = asyncio.get_running_loop().create_future()
+    await round_queue.put(future)
+    return await future
+
+
+class InvalidArguments(Exception):
+    """Malformed tool arguments, reported as a JSON-RPC -32602 error."""
+
+
+async def _wait_next_round(arguments: Dict) -> Dict:
+    timeout = arguments.get("timeout_seconds", WAIT_NEXT_ROUND_DEFAULT_TIMEOUT)
+    # bool is an int subclass; `not >= 0` also rejects NaN
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout >= 0:
+        raise InvalidArguments("timeout_seconds must be a non-negative number")
+    timeout = min(float(timeout), WAIT_NEXT_ROUND_MAX_TIMEOUT)
+
+    round_number = arguments.get("round_number")
+    if "round_number" in arguments and (
+        isinstance(round_number, bool) or not isinstance(round_number, int)
+    ):
+        raise InvalidArguments("round_number must be an integer")
+
+    async with round_advanced:
+        since = game_state.current_round if round_number is None else round_number
+        try:
+            await asyncio.wait_for(
+                round_advanced.wait_for(lambda: game_state.current_round > since),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            pass
+        return {
+            "round_number": game_state.current_round,
+            "advanced": game_state.current_round > since,
+        }
+
 
 # ---------- MCP Server (FastAPI + JSON-RPC over HTTP) ----------
 
-app = FastAPI()
+# Tool results are always returned as a "json" content block. Spec-only MCP
+# clients read the "text" block instead, so the pretty-printed copy is kept
+# by default; set ALLIANCE_MCP_TEXT_CONTENT=0 when every client reads json
+# to roughly halve response size and encoding work.
+INCLUDE_TEXT_CONTENT = os.getenv("ALLIANCE_MCP_TEXT_CONTENT", "1") != "0"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker = asyncio.create_task(_round_worker())
+    try:
+        yield
+    finally:
+        worker.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 def _tool_def(name: str, description: str, input_schema: Dict) -> Dict:
@@ -283,11 +414,82 @@ TOOLS = [
             "required": ["private_id", "player_to_support"],
         },
     ),
+    _tool_def(
+        "take_turn_auto",
+        "Play your turn automatically: support the highest-scoring player who "
+        "supported you last round (else the highest-scoring player) and get "
+        "your status back in the same call.",
+        {
+            "type": "object",
+            "properties": {
+                "private_id": {
+                    "type": "string",
+                    "description": "Your private ID",
+                },
+            },
+            "required": ["private_id"],
+        },
+    ),
+    _tool_def(
+        "wait_next_round",
+        "Wait until the current round has been scored and the next one starts "
+        "(or until the timeout expires). Use this instead of polling get_status.",
+        {
+            "type": "object",
+            "properties": {
+                "round_number": {
+                    "type": "integer",
+                    "description": "Wait for a round after this one (default: the current round)",
+                },
+                "timeout_seconds": {
+                    "type": "number",
+                    "description": "Give up after this many seconds (default 25, max 60)",
+                },
+            },
+        },
+    ),
 ]
 
 
-def _json_rpc_result(id_value, result_obj):
-    return JSONResponse(
+def _encode_json(obj) -> bytes:
+    return orjson.dumps(obj)
+
+
+# initialize and tools/list always return the same result, so it is encoded
+# once here and only the request id is spliced in per call.
+INITIALIZE_RESULT_JSON = _encode_json(
+    {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {
+            "tools": {
+                "listChanged": False,
+            }
+        },
+        "serverInfo": {
+            "name": "Local Alliance Game MCP Server",
+            "version": "0.1.0",
+        },
+    }
+)
+
+TOOLS_LIST_RESULT_JSON = _encode_json(
+    {
+        "tools": TOOLS,
+        "nextCursor": None,
+    }
+)
+
+
+# Handlers return encoded JSON-RPC response objects, so a batch can be
+# answered by joining them without decoding and re-encoding each one.
+
+
+def _json_rpc_encoded_result(id_value, result_json: bytes) -> bytes:
+    return b'{"jsonrpc":"2.0","id":%s,"result":%s}' % (_encode_json(id_value), result_json)
+
+
+def _json_rpc_result(id_value, result_obj) -> bytes:
+    return _encode_json(
         {
             "jsonrpc": "2.0",
             "id": id_value,
@@ -296,8 +498,8 @@ def _json_rpc_result(id_value, result_obj):
     )
 
 
-def _json_rpc_error(id_value, code: int, message: str):
-    return JSONResponse(
+def _json_rpc_error(id_value, code: int, message: str) -> bytes:
+    return _encode_json(
         {
             "jsonrpc": "2.0",
             "id": id_value,
@@ -306,100 +508,158 @@ def _json_rpc_error(id_value, code: int, message: str):
     )
 
 
-@app.post("/mcp")
-async def mcp_endpoint(request: Request):
-    payload = await request.json()
-    method = payload.get("method")
-    req_id = payload.get("id")
-    params = payload.get("params", {}) or {}
-
-    # Notifications (no id) – just acknowledge with 204
-    if req_id is None and method.startswith("notifications/"):
-        return JSONResponse(status_code=204, content=None)
-
-    # ----- initialize -----
-    if method == "initialize":
-        # we mostly ignore requested protocolVersion/capabilities
-        result = {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {
-                "tools": {
-                    "listChanged": False,
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+# ----- JSON-RPC method handlers -----
+
+
+async def _handle_initialize(req_id, params: Dict):
+    # we mostly ignore requested protocolVersion/capabilities
+    return _json_rpc_encoded_result(req_id, INITIALIZE_RESULT_JSON)
+
+
+async def _handle_tools_list(req_id, params: Dict):
+    return _json_rpc_encoded_result(req_id, TOOLS_LIST_RESULT_JSON)
+
+
+async def _handle_tools_call(req_id, params: Dict):
+    name = params.get("name")
+    arguments = params.get("arguments") or {}
+    if not isinstance(arguments, dict):
+        return _json_rpc_error(req_id, -32602, "Invalid arguments: expected an object")
+
+    try:
+        if name == "wait_next_round":
+            # Blocks until the next round; releases the lock while waiting
+            res = await _wait_next_round(arguments)
+        else:
+            async with game_lock:
+                if name == "register_player":
+                    res = game_state.register_player(arguments["player_name"])
+                elif name == "get_status":
+                    res = game_state.get_status(arguments["private_id"])
+                elif name == "send_message":
+                    res = game_state.send_message(
+                        arguments["private_id"],
+                        arguments["recipient_player_name"],
+                        arguments["message"],
+                    )
+                elif name == "register_support":
+                    res = game_state.register_support(
+                        arguments["private_id"],
+                        arguments["player_to_support"],
+                    )
+                elif name == "take_turn_auto":
+                    res = game_state.take_turn_auto(arguments["private_id"])
+                else:
+                    return _json_rpc_error(
+                        req_id, -32602, f"Unknown tool: {name}"
+                    )
+
+        content = [{"type": "json", "json": res}]
+        if INCLUDE_TEXT_CONTENT:
+            content.append(
+                {
+                    "type": "text",
+                    "text": orjson.dumps(res, option=orjson.OPT_INDENT_2).decode(),
                 }
+            )
+        return _json_rpc_result(
+            req_id,
+            {
+                "content": content,
+                "isError": False,
             },
-            "serverInfo": {
-                "name": "Local Alliance Game MCP Server",
-                "version": "0.1.0",
+        )
+    except ValueError as e:
+        # Rejected by game rules (unknown player, duplicate name, ...). This is
+        # a tool execution error, so per MCP it goes back as an isError result
+        # the model can read and correct; malformed requests stay JSON-RPC
+        # errors.
+        return _json_rpc_result(
+            req_id,
+            {
+                "content": [{"type": "text", "text": f"Error: {e}"}],
+                "isError": True,
             },
-        }
-        return _json_rpc_result(req_id, result)
+        )
+    except KeyError as e:
+        return _json_rpc_error(req_id, -32602, f"Missing argument: {e.args[0]}")
+    except InvalidArguments as e:
+        return _json_rpc_error(req_id, -32602, str(e))
+    except Exception as e:
+        return _json_rpc_error(req_id, -32603, f"Internal error: {e}")
 
-    # ----- tools/list -----
-    if method == "tools/list":
-        result = {
-            "tools": TOOLS,
-            "nextCursor": None,
-        }
-        return _json_rpc_result(req_id, result)
 
-    # ----- tools/call -----
-    if method == "tools/call":
-        name = params.get("name")
-        arguments = params.get("arguments") or {}
+async def _handle_advance_round(req_id, params: Dict):
+    # Admin method
+    scoreboard = await _advance_round()
+    return _json_rpc_result(req_id, scoreboard)
 
-        try:
-            if name == "register_player":
-                res = game_state.register_player(arguments["player_name"])
-            elif name == "get_status":
-                res = game_state.get_status(arguments["private_id"])
-            elif name == "send_message":
-                res = game_state.send_message(
-                    arguments["private_id"],
-                    arguments["recipient_player_name"],
-                    arguments["message"],
-                )
-            elif name == "register_support":
-                res = game_state.register_support(
-                    arguments["private_id"],
-                    arguments["player_to_support"],
-                )
-            else:
-                return _json_rpc_error(
-                    req_id, -32602, f"Unknown tool: {name}"
-                )
 
-            content = [
-                {"type": "json", "json": res},
-                {
-                    "type": "text",
-                    "text": json.dumps(res, indent=2),
-                },
-            ]
-            return _json_rpc_result(
-                req_id,
-                {
-                    "content": content,
-                    "isError": False,
-                },
-            )
-        except Exception as e:
-            # Tool execution error – still a valid result with isError = True
-            content = [{"type": "text", "text": f"Error: {e}"}]
-            return _json_rpc_result(
-                req_id,
-                {
-                    "content": content,
-                    "isError": True,
-                },
-            )
+METHOD_HANDLERS = {
+    "initialize": _handle_initialize,
+    "tools/list": _handle_tools_list,
+    "tools/call": _handle_tools_call,
+    "game/advance_round": _handle_advance_round,
+}
+
+
+async def _dispatch(payload) -> Optional[bytes]:
+    """
+    Handle one JSON-RPC request object. Returns the encoded response, or
+    None for a notification.
+    """
+    if not isinstance(payload, dict):
+        return _json_rpc_error(None, -32600, "Invalid Request")
+
+    method = payload.get("method")
+    req_id = payload.get("id")
+    if not isinstance(method, str):
+        return _json_rpc_error(req_id, -32600, "Invalid Request: missing method")
 
-    # ----- Admin method: game/advance_round -----
-    if method == "game/advance_round":
-        scoreboard = game_state.advance_round()
-        return _json_rpc_result(req_id, scoreboard)
+    # Notifications (no id) – nothing to send back
+    if req_id is None and method.startswith("notifications/"):
+        return None
+
+    handler = METHOD_HANDLERS.get(method)
+    if handler is None:
+        return _json_rpc_error(req_id, -32601, f"Method not found: {method}")
+
+    params = payload.get("params", {}) or {}
+    if not isinstance(params, dict):
+        return _json_rpc_error(req_id, -32602, "Invalid params: expected an object")
+    return await handler(req_id, params)
 
-    # Unknown method
-    return _json_rpc_error(req_id, -32601, f"Method not found: {method}")
+
+@app.post("/mcp")
+async def mcp_endpoint(request: Request):
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return _json_response(_json_rpc_error(None, -32700, "Parse error"))
+
+    # JSON-RPC batch: requests are handled in order and answered with one
+    # array of responses (notifications get none).
+    if isinstance(payload, list):
+        if not payload:
+            return _json_response(_json_rpc_error(None, -32600, "Invalid Request"))
+        bodies = []
+        for item in payload:
+            body = await _dispatch(item)
+            if body is not None:
+                bodies.append(body)
+        if not bodies:
+            return Response(status_code=204)
+        return _json_response(b"[" + b",".join(bodies) + b"]")
+
+    body = await _dispatch(payload)
+    if body is None:
+        # Notifications – just acknowledge with 204
+        return Response(status_code=204)
+    return _json_response(body)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,83 @@
-import json
+import asyncio
 import datetime
-from typing import Any, Dict, List, Optional
+import itertools
+from typing import Any, Awaitable, Dict, List, Optional, TextIO, Tuple
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 
-class MCPClient:
+class _MCPClientBase:
+    """
+    Request building and result checking shared by MCPClient and
+    AsyncMCPClient; subclasses only differ in how a payload is posted.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        protocol_version: str = "2025-06-18",
+        timeout: int = 30,
+    ) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.protocol_version = protocol_version
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+
+    def _next_id(self) -> str:
+        return f"req-{next(self._ids)}"
+
+    def _request_payload(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        notification: bool = False,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"jsonrpc": "2.0"}
+        if not notification:
+            payload["id"] = self._next_id()
+        payload["method"] = method
+        if params is not None:
+            payload["params"] = params
+        return payload
+
+    @staticmethod
+    def _unwrap_result(method: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in data:
+            raise RuntimeError(
+                f"JSON-RPC error from {method}: "
+                f"{data['error'].get('code')} {data['error'].get('message')}"
+            )
+
+        return data.get("result", {})
+
+    def _initialize_params(
+        self,
+        client_name: str,
+        client_version: str,
+        capabilities: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        if capabilities is None:
+            # We declare we understand tools/resources/prompts, which is typical.
+            capabilities = {
+                "tools": {},
+                "resources": {},
+                "prompts": {},
+            }
+
+        return {
+            "protocolVersion": self.protocol_version,
+            "capabilities": capabilities,
+            "clientInfo": {
+                "name": client_name,
+                "version": client_version,
+            },
+        }
+
+
+class MCPClient(_MCPClientBase):
     """
     Minimal MCP JSON-RPC client for HTTP endpoints.
 
@@ -23,62 +95,45 @@ class MCPClient:
         protocol_version: str = "2025-06-18",
         timeout: int = 30,
     ) -> None:
-        self.endpoint = endpoint.rstrip("/")
-        self.protocol_version = protocol_version
-        self.timeout = timeout
-        self._id_counter = 0
+        super().__init__(endpoint, protocol_version, timeout)
 
-    def _next_id(self) -> str:
-        self._id_counter += 1
-        return f"req-{self._id_counter}"
+        # One keep-alive session for every call, so paginated listings reuse
+        # the same connection instead of reconnecting per request.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self._session.close()
 
     def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        resp = requests.post(
+        resp = self._session.post(
             self.endpoint,
             json=payload,
             timeout=self.timeout,
             headers={"Content-Type": "application/json"},
         )
         resp.raise_for_status()
-        data = resp.json()
-        return data
+        # Notifications are acknowledged with an empty 204
+        if not resp.content:
+            return {}
+        return orjson.loads(resp.content)
 
     def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Send a JSON-RPC request and return the 'result' field.
         Raises RuntimeError if the server returns an error object.
         """
-        payload: Dict[str, Any] = {
-            "jsonrpc": "2.0",
-            "id": self._next_id(),
-            "method": method,
-        }
-        if params is not None:
-            payload["params"] = params
-
-        data = self._post(payload)
-
-        if "error" in data:
-            raise RuntimeError(
-                f"JSON-RPC error from {method}: "
-                f"{data['error'].get('code')} {data['error'].get('message')}"
-            )
-
-        return data.get("result", {})
+        data = self._post(self._request_payload(method, params))
+        return self._unwrap_result(method, data)
 
     def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
         """
         Send a JSON-RPC notification (no id, no result expected).
         """
-        payload: Dict[str, Any] = {
-            "jsonrpc": "2.0",
-            "method": method,
-        }
-        if params is not None:
-            payload["params"] = params
-
         # Fire-and-forget; we still check HTTP status
-        self._post(payload)
+        self._post(self._request_payload(method, params, notification=True))
 
     def initialize(
         self,
@@ -90,24 +145,9 @@ class MCPClient:
         Perform MCP initialize handshake and send the initialized notification.
         Returns the initialize result (server capabilities, serverInfo, etc.).
         """
-        if capabilities is None:
-            # We declare we understand tools/resources/prompts, which is typical.
-            capabilities = {
-                "tools": {},
-                "resources": {},
-                "prompts": {},
-            }
-
         result = self.call(
             "initialize",
-            {
-                "protocolVersion": self.protocol_version,
-                "capabilities": capabilities,
-                "clientInfo": {
-                    "name": client_name,
-                    "version": client_version,
-                },
-            },
+            self._initialize_params(client_name, client_version, capabilities),
         )
 
         # Official spec uses `notifications/initialized` for this notification.
@@ -154,187 +194,341 @@ class MCPClient:
         return self._list_with_pagination("prompts/list", "prompts")
 
 
+class AsyncMCPClient(_MCPClientBase):
+    """
+    asyncio version of MCPClient on top of httpx.AsyncClient.
+
+    Each paginated listing is still sequential (it needs nextCursor), but
+    tools/resources/prompts can be awaited together on one event loop.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        protocol_version: str = "2025-06-18",
+        timeout: int = 30,
+    ) -> None:
+        super().__init__(endpoint, protocol_version, timeout)
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        resp = await self._client.post(self.endpoint, content=orjson.dumps(payload))
+        resp.raise_for_status()
+        if not resp.content:
+            return {}
+        return orjson.loads(resp.content)
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request and return the 'result' field.
+        Raises RuntimeError if the server returns an error object.
+        """
+        data = await self._post(self._request_payload(method, params))
+        return self._unwrap_result(method, data)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Send a JSON-RPC notification (no id, no result expected).
+        """
+        await self._post(self._request_payload(method, params, notification=True))
+
+    async def initialize(
+        self,
+        client_name: str = "mcp-doc-generator",
+        client_version: str = "0.1.0",
+        capabilities: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Perform MCP initialize handshake and send the initialized notification.
+        """
+        result = await self.call(
+            "initialize",
+            self._initialize_params(client_name, client_version, capabilities),
+        )
+        await self.notify("notifications/initialized")
+        return result
+
+    async def _list_with_pagination(
+        self,
+        method: str,
+        result_key: str,
+    ) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        cursor: Optional[str] = None
+
+        while True:
+            params = {}
+            if cursor is not None:
+                params["cursor"] = cursor
+
+            result = await self.call(method, params or None)
+            items.extend(result.get(result_key, []))
+
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+
+        return items
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        return await self._list_with_pagination("tools/list", "tools")
+
+    async def list_resources(self) -> List[Dict[str, Any]]:
+        return await self._list_with_pagination("resources/list", "resources")
+
+    async def list_prompts(self) -> List[Dict[str, Any]]:
+        return await self._list_with_pagination("prompts/list", "prompts")
+
+
 def _to_markdown_code_block(obj: Any, language: str = "json") -> str:
-    return f"```{language}\n{json.dumps(obj, indent=2, sort_keys=True)}\n```"
+    text = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
+    return f"```{language}\n{text}\n```"
 
 
-def generate_mcp_documentation(
-    endpoint: str,
-    output_path: str = "README.md",
-    protocol_version: str = "2025-06-18",
-) -> None:
-    """
-    Connects to an MCP server over HTTP JSON-RPC and writes a markdown
-    documentation file describing its tools, resources, and prompts.
-    """
-    client = MCPClient(endpoint=endpoint, protocol_version=protocol_version)
+def _writeln(f: TextIO, line: str = "") -> None:
+    f.write(line)
+    f.write("\n")
 
-    # 1. Initialize / handshake
-    init_result = client.initialize()
-    server_info = init_result.get("serverInfo", {})
-    capabilities = init_result.get("capabilities", {})
-    negotiated_proto = init_result.get("protocolVersion", protocol_version)
 
-    now = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+async def _fetch_listing(
+    listing: Awaitable[List[Dict[str, Any]]],
+) -> Tuple[List[Dict[str, Any]], Optional[Exception]]:
+    """
+    Await one list call, returning (items, None) or ([], exc) on failure so a
+    broken endpoint only empties its own section.
+    """
+    try:
+        return await listing, None
+    except Exception as exc:
+        return [], exc
 
-    md_lines: List[str] = []
 
-    # Header
-    md_lines.append("# MCP Server Documentation\n")
-    md_lines.append(f"- **Endpoint:** `{endpoint}`")
-    md_lines.append(f"- **Generated at (UTC):** `{now}`")
-    md_lines.append(f"- **Negotiated protocolVersion:** `{negotiated_proto}`")
+def _write_header(
+    f: TextIO,
+    endpoint: str,
+    now: str,
+    negotiated_proto: str,
+    server_info: Dict[str, Any],
+) -> None:
+    _writeln(f, "# MCP Server Documentation\n")
+    _writeln(f, f"- **Endpoint:** `{endpoint}`")
+    _writeln(f, f"- **Generated at (UTC):** `{now}`")
+    _writeln(f, f"- **Negotiated protocolVersion:** `{negotiated_proto}`")
 
     if server_info:
-        md_lines.append(f"- **Server name:** `{server_info.get('name', '?')}`")
-        md_lines.append(f"- **Server version:** `{server_info.get('version', '?')}`")
+        _writeln(f, f"- **Server name:** `{server_info.get('name', '?')}`")
+        _writeln(f, f"- **Server version:** `{server_info.get('version', '?')}`")
 
-    md_lines.append("\n---\n")
+    _writeln(f, "\n---\n")
 
-    # Capabilities
-    md_lines.append("## Capabilities\n")
+
+def _write_capabilities(f: TextIO, capabilities: Dict[str, Any]) -> None:
+    _writeln(f, "## Capabilities\n")
     if capabilities:
-        md_lines.append(_to_markdown_code_block(capabilities))
+        _writeln(f, _to_markdown_code_block(capabilities))
     else:
-        md_lines.append("_Server did not return capabilities in initialize result._\n")
+        _writeln(f, "_Server did not return capabilities in initialize result._\n")
 
-    # 2. Tools
-    md_lines.append("\n---\n")
-    md_lines.append("## Tools\n")
 
-    try:
-        tools = client.list_tools()
-    except Exception as exc:
-        md_lines.append(
-            f"_Failed to call `tools/list`: `{type(exc).__name__}: {exc}`_\n"
-        )
-        tools = []
+def _write_tools(
+    f: TextIO,
+    tools: List[Dict[str, Any]],
+    error: Optional[Exception],
+) -> None:
+    _writeln(f, "\n---\n")
+    _writeln(f, "## Tools\n")
+
+    if error is not None:
+        _writeln(f, f"_Failed to call `tools/list`: `{type(error).__name__}: {error}`_\n")
 
     if not tools:
-        md_lines.append("_No tools reported by server or call failed._\n")
-    else:
-        for tool in tools:
-            name = tool.get("name", "unknown_tool")
-            md_lines.append(f"\n### `{name}`\n")
-
-            desc = tool.get("description")
-            if desc:
-                md_lines.append(desc + "\n")
-
-            input_schema = tool.get("inputSchema")
-            if input_schema:
-                md_lines.append("**Input schema:**")
-                md_lines.append(_to_markdown_code_block(input_schema))
-
-            output_schema = tool.get("outputSchema")
-            if output_schema:
-                md_lines.append("**Output schema:**")
-                md_lines.append(_to_markdown_code_block(output_schema))
-
-            # Any extra fields
-            extras = {
-                k: v
-                for k, v in tool.items()
-                if k not in {"name", "description", "inputSchema", "outputSchema"}
-            }
-            if extras:
-                md_lines.append("**Extra metadata:**")
-                md_lines.append(_to_markdown_code_block(extras))
+        _writeln(f, "_No tools reported by server or call failed._\n")
+        return
+
+    for tool in tools:
+        name = tool.get("name", "unknown_tool")
+        _writeln(f, f"\n### `{name}`\n")
+
+        desc = tool.get("description")
+        if desc:
+            _writeln(f, desc + "\n")
+
+        input_schema = tool.get("inputSchema")
+        if input_schema:
+            _writeln(f, "**Input schema:**")
+            _writeln(f, _to_markdown_code_block(input_schema))
+
+        output_schema = tool.get("outputSchema")
+        if output_schema:
+            _writeln(f, "**Output schema:**")
+            _writeln(f, _to_markdown_code_block(output_schema))
+
+        # Any extra fields
+        extras = {
+            k: v
+            for k, v in tool.items()
+            if k not in {"name", "description", "inputSchema", "outputSchema"}
+        }
+        if extras:
+            _writeln(f, "**Extra metadata:**")
+            _writeln(f, _to_markdown_code_block(extras))
 
-    # 3. Resources
-    md_lines.append("\n---\n")
-    md_lines.append("## Resources\n")
 
-    try:
-        resources = client.list_resources()
-    except Exception as exc:
-        md_lines.append(
-            f"_Failed to call `resources/list`: `{type(exc).__name__}: {exc}`_\n"
-        )
-        resources = []
+def _write_resources(
+    f: TextIO,
+    resources: List[Dict[str, Any]],
+    error: Optional[Exception],
+) -> None:
+    _writeln(f, "\n---\n")
+    _writeln(f, "## Resources\n")
+
+    if error is not None:
+        _writeln(f, f"_Failed to call `resources/list`: `{type(error).__name__}: {error}`_\n")
 
     if not resources:
-        md_lines.append("_No resources reported by server or call failed._\n")
-    else:
-        for res in resources:
-            uri = res.get("uri", "unknown://")
-            md_lines.append(f"\n### `{uri}`\n")
-
-            name = res.get("name")
-            if name:
-                md_lines.append(f"- **Name:** {name}")
-            title = res.get("title")
-            if title:
-                md_lines.append(f"- **Title:** {title}")
-            mime_type = res.get("mimeType")
-            if mime_type:
-                md_lines.append(f"- **MIME type:** `{mime_type}`")
-
-            desc = res.get("description")
-            if desc:
-                md_lines.append(f"- **Description:** {desc}")
-
-            # Extra resource fields
-            extras = {
-                k: v
-                for k, v in res.items()
-                if k not in {"uri", "name", "title", "description", "mimeType"}
-            }
-            if extras:
-                md_lines.append("\n**Extra metadata:**")
-                md_lines.append(_to_markdown_code_block(extras))
+        _writeln(f, "_No resources reported by server or call failed._\n")
+        return
+
+    for res in resources:
+        uri = res.get("uri", "unknown://")
+        _writeln(f, f"\n### `{uri}`\n")
+
+        name = res.get("name")
+        if name:
+            _writeln(f, f"- **Name:** {name}")
+        title = res.get("title")
+        if title:
+            _writeln(f, f"- **Title:** {title}")
+        mime_type = res.get("mimeType")
+        if mime_type:
+            _writeln(f, f"- **MIME type:** `{mime_type}`")
+
+        desc = res.get("description")
+        if desc:
+            _writeln(f, f"- **Description:** {desc}")
+
+        # Extra resource fields
+        extras = {
+            k: v
+            for k, v in res.items()
+            if k not in {"uri", "name", "title", "description", "mimeType"}
+        }
+        if extras:
+            _writeln(f, "\n**Extra metadata:**")
+            _writeln(f, _to_markdown_code_block(extras))
 
-    # 4. Prompts
-    md_lines.append("\n---\n")
-    md_lines.append("## Prompts\n")
 
-    try:
-        prompts = client.list_prompts()
-    except Exception as exc:
-        md_lines.append(
-            f"_Failed to call `prompts/list`: `{type(exc).__name__}: {exc}`_\n"
-        )
-        prompts = []
+def _write_prompts(
+    f: TextIO,
+    prompts: List[Dict[str, Any]],
+    error: Optional[Exception],
+) -> None:
+    _writeln(f, "\n---\n")
+    _writeln(f, "## Prompts\n")
+
+    if error is not None:
+        _writeln(f, f"_Failed to call `prompts/list`: `{type(error).__name__}: {error}`_\n")
 
     if not prompts:
-        md_lines.append("_No prompts reported by server or call failed._\n")
-    else:
-        for prompt in prompts:
-            name = prompt.get("name", "unnamed_prompt")
-            md_lines.append(f"\n### `{name}`\n")
-
-            desc = prompt.get("description")
-            if desc:
-                md_lines.append(desc + "\n")
-
-            args = prompt.get("arguments") or []
-            if args:
-                md_lines.append("**Arguments:**")
-                for arg in args:
-                    arg_name = arg.get("name", "arg")
-                    arg_desc = arg.get("description", "")
-                    required = arg.get("required", False)
-                    md_lines.append(
-                        f"- `{arg_name}` "
-                        f"{'(required)' if required else '(optional)'}"
-                        f"{' — ' + arg_desc if arg_desc else ''}"
-                    )
-
-            # Extra prompt fields
-            extras = {
-                k: v for k, v in prompt.items() if k not in {"name", "description", "arguments"}
-            }
-            if extras:
-                md_lines.append("\n**Extra metadata:**")
-                md_lines.append(_to_markdown_code_block(extras))
+        _writeln(f, "_No prompts reported by server or call failed._\n")
+        return
+
+    for prompt in prompts:
+        name = prompt.get("name", "unnamed_prompt")
+        _writeln(f, f"\n### `{name}`\n")
+
+        desc = prompt.get("description")
+        if desc:
+            _writeln(f, desc + "\n")
+
+        args = prompt.get("arguments") or []
+        if args:
+            _writeln(f, "**Arguments:**")
+            for arg in args:
+                arg_name = arg.get("name", "arg")
+                arg_desc = arg.get("description", "")
+                required = arg.get("required", False)
+                _writeln(
+                    f,
+                    f"- `{arg_name}` "
+                    f"{'(required)' if required else '(optional)'}"
+                    f"{' — ' + arg_desc if arg_desc else ''}",
+                )
+
+        # Extra prompt fields
+        extras = {
+            k: v for k, v in prompt.items() if k not in {"name", "description", "arguments"}
+        }
+        if extras:
+            _writeln(f, "\n**Extra metadata:**")
+            _writeln(f, _to_markdown_code_block(extras))
 
-    # 5. Write to file
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(md_lines))
+
+async def generate_mcp_documentation_async(
+    endpoint: str,
+    output_path: str = "README.md",
+    protocol_version: str = "2025-06-18",
+) -> None:
+    """
+    Connects to an MCP server over HTTP JSON-RPC and writes a markdown
+    documentation file describing its tools, resources, and prompts.
+    """
+    client = AsyncMCPClient(endpoint=endpoint, protocol_version=protocol_version)
+
+    try:
+        # 1. Initialize / handshake
+        init_result = await client.initialize()
+        server_info = init_result.get("serverInfo", {})
+        capabilities = init_result.get("capabilities", {})
+        negotiated_proto = init_result.get("protocolVersion", protocol_version)
+
+        now = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+        # 2. The three listings are independent, so await them together;
+        #    only each pagination chain is sequential.
+        tools, resources, prompts = await asyncio.gather(
+            _fetch_listing(client.list_tools()),
+            _fetch_listing(client.list_resources()),
+            _fetch_listing(client.list_prompts()),
+        )
+
+        # 3. Stream each section straight into the output file
+        with open(output_path, "w", encoding="utf-8") as f:
+            _write_header(f, endpoint, now, negotiated_proto, server_info)
+            _write_capabilities(f, capabilities)
+            _write_tools(f, *tools)
+            _write_resources(f, *resources)
+            _write_prompts(f, *prompts)
+    finally:
+        await client.aclose()
 
     print(f"Documentation written to {output_path}")
 
 
+def generate_mcp_documentation(
+    endpoint: str,
+    output_path: str = "README.md",
+    protocol_version: str = "2025-06-18",
+) -> None:
+    """
+    Synchronous entry point for generate_mcp_documentation_async.
+    """
+    asyncio.run(
+        generate_mcp_documentation_async(
+            endpoint=endpoint,
+            output_path=output_path,
+            protocol_version=protocol_version,
+        )
+    )
+
+
 if __name__ == "__main__":
     # Generate docs for your Alliance Game MCP server into README.md
     generate_mcp_documentation(
@@ -1,79 +1,213 @@
 # dummy_agent.py
+import itertools
 import os
 import random
-import requests
-from typing import Any, Dict, List, Optional
+import sys
+import orjson
+import urllib3
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
 
 
 SERVER_URL = os.getenv("ALLIANCE_MCP_SERVER", "http://localhost:8000/mcp")
 
+INITIALIZE_PARAMS = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {"tools": {}},
+    "clientInfo": {"name": "dummy-agent", "version": "0.1.0"},
+}
+
+
+def _content_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("isError"):
+        raise RuntimeError(result["content"][0].get("text"))
+
+    # Prefer JSON content if present; remember the first text block on the
+    # way so the fallback needs no second scan
+    text_fallback = None
+    for item in result.get("content", ()):
+        content_type = item.get("type")
+        if content_type == "json":
+            return item["json"]
+        if content_type == "text" and text_fallback is None:
+            text_fallback = item.get("text", "")
+
+    # Fallback: parse JSON from text if possible
+    if text_fallback is not None:
+        try:
+            return orjson.loads(text_fallback)
+        except Exception:
+            return {"raw_text": text_fallback}
+
+    return {}
+
 
 class MCPClient:
-    def __init__(self, endpoint: str):
+    def __init__(self, endpoint: str, pool_maxsize: int = 1):
         self.endpoint = endpoint
-        self._id_counter = 0
+        # Ids must be unique within a batch so responses can be matched up.
+        # Bound straight to the counter's C-level __next__.
+        self._next_id = itertools.count(1).__next__
+        # One keep-alive connection pool pinned to the endpoint's host, instead
+        # of a fresh TCP (and TLS) connection per JSON-RPC request. The URL is
+        # split once here, so a call is just urlopen() on a fixed path with
+        # fixed headers. The pool is sized to the number of requests in flight
+        # at once; with sequential calls that is one socket for the whole game.
+        split = urlsplit(endpoint)
+        pool_cls = urllib3.HTTPSConnectionPool if split.scheme == "https" else urllib3.HTTPConnectionPool
+        self._pool = pool_cls(split.hostname, split.port, maxsize=pool_maxsize, block=False)
+        self._path = split.path or "/"
+        if split.query:
+            self._path += "?" + split.query
+        self._headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        }
+        # Request scaffolding built once. Single calls fill in id/name/arguments
+        # and serialize straight away, so the templates are reused in place
+        # (the client is not meant to be shared across threads).
+        self._initialize_tpl = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": INITIALIZE_PARAMS,
+        }
+        self._tool_params_tpl = {"name": "", "arguments": {}}
+        self._tool_call_tpl = {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "tools/call",
+            "params": self._tool_params_tpl,
+        }
+        self._method_tpl: Dict[str, Any] = {"jsonrpc": "2.0", "id": 0, "method": "", "params": {}}
+        self._method_noargs_tpl: Dict[str, Any] = {"jsonrpc": "2.0", "id": 0, "method": ""}
+
+    def close(self):
+        self._pool.close()
+
+    def _send(self, body: bytes) -> Any:
+        resp = self._pool.urlopen(
+            "POST",
+            self._path,
+            body=body,
+            headers=self._headers,
+            timeout=30,
+        )
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status} from {self.endpoint}")
+        if not resp.data:
+            return None
+        return orjson.loads(resp.data)
 
-    def _next_id(self) -> int:
-        self._id_counter += 1
-        return self._id_counter
+    @staticmethod
+    def _check(payload: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in data:
+            raise RuntimeError(
+                f"JSON-RPC error from {payload.get('method')}: "
+                f"{data['error'].get('code')} {data['error'].get('message')}"
+            )
+        return data
 
     def _post(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        resp = requests.post(self.endpoint, json=payload, timeout=30)
-        resp.raise_for_status()
-        if not resp.content:
+        data = self._send(orjson.dumps(payload))
+        if data is None:
             return None
-        return resp.json()
+        return self._check(payload, data)
+
+    def batch(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send several requests as one JSON-RPC batch (a single HTTP round trip).
+        Returns the responses in the same order as `payloads`.
+        """
+        if not payloads:
+            return []
+        data = self._send(orjson.dumps(payloads))
+        if not isinstance(data, list):
+            # A batch-level error object, or an empty 204 for all-notification
+            # batches, instead of one response per request
+            if isinstance(data, dict) and "error" in data:
+                raise RuntimeError(
+                    f"JSON-RPC batch error: "
+                    f"{data['error'].get('code')} {data['error'].get('message')}"
+                )
+            raise RuntimeError("JSON-RPC batch returned no responses")
+        by_id = {item.get("id"): item for item in data}
+        results = []
+        for payload in payloads:
+            # Errors the server could not tie to a request carry id null
+            item = by_id.get(payload["id"]) or by_id.get(None)
+            if item is None:
+                raise RuntimeError(f"No response to {payload.get('method')} (id {payload['id']})")
+            results.append(self._check(payload, item))
+        return results
 
     def initialize(self) -> Dict[str, Any]:
-        payload = {
-            "jsonrpc": "2.0",
-            "id": self._next_id(),
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {"tools": {}},
-                "clientInfo": {"name": "dummy-agent", "version": "0.1.0"},
-            },
-        }
+        payload = self._initialize_tpl
+        payload["id"] = self._next_id()
         data = self._post(payload)
         return data["result"]
 
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        payload = {
+    def tool_request(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        # Fresh dicts: these are collected into batches before being sent
+        return {
             "jsonrpc": "2.0",
             "id": self._next_id(),
             "method": "tools/call",
             "params": {"name": name, "arguments": arguments},
         }
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        payload = self._tool_call_tpl
+        payload["id"] = self._next_id()
+        self._tool_params_tpl["name"] = name
+        self._tool_params_tpl["arguments"] = arguments
         data = self._post(payload)
-        result = data["result"]
-
-        # Prefer JSON content if present
-        for item in result.get("content", []):
-            if item.get("type") == "json":
-                return item["json"]
-
-        # Fallback: parse JSON from text if possible
-        for item in result.get("content", []):
-            if item.get("type") == "text":
-                text = item.get("text", "")
-                try:
-                    return json.loads(text)
-                except Exception:
-                    return {"raw_text": text}
-
-        return {}
-
-    def call_method(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict:
-        payload = {
-            "jsonrpc": "2.0",
-            "id": self._next_id(),
-            "method": method,
-        }
-        if params is not None:
-            payload["params"] = params
-        data = self._post(payload)
-        return data["result"]
+        return _content_payload(data["result"])
+
+    def call_tools(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run several tool_request() payloads in one batch and return their
+        parsed results in order.
+        """
+        return [_content_payload(data["result"]) for data in self.batch(requests)]
+
+    # Whether a method takes params is fixed at each call site, so the two
+    # cases get their own template and entry point instead of a branch.
+    def call_method(self, method: str, params: Dict[str, Any]) -> Dict:
+        payload = self._method_tpl
+        payload["id"] = self._next_id()
+        payload["method"] = method
+        payload["params"] = params
+        return self._post(payload)["result"]
+
+    def call_method_noargs(self, method: str) -> Dict:
+        payload = self._method_noargs_tpl
+        payload["id"] = self._next_id()
+        payload["method"] = method
+        return self._post(payload)["result"]
+
+
+def _pick_target(others: Iterable[Dict[str, Any]], rng: random.Random) -> Optional[str]:
+    """
+    Pure core of Participant.choose_support: one pass over the other players
+    that prefers last round's allies, then the higher score. Ties are broken
+    at random with `rng` as they are met (reservoir sampling: the k-th tied
+    player takes the pick with probability 1/k), so no candidate list is
+    built and a unique best needs no random draw.
+    """
+    best = None
+    best_key = None
+    ties = 0
+    for p in others:
+        key = (bool(p.get("supported_you_last_round")), p["score"])
+        if best_key is None or key > best_key:
+            best, best_key, ties = p["player_name"], key, 1
+        elif key == best_key:
+            ties += 1
+            if rng.randrange(ties) == 0:
+                best = p["player_name"]
+    return best
 
 
 class Participant:
@@ -82,11 +216,28 @@ class Participant:
     You can later replace choose_support() with a call to an OpenAI model.
     """
 
-    def __init__(self, name: str, client: MCPClient):
+    def __init__(
+        self,
+        name: str,
+        client: MCPClient,
+        negotiate: bool = False,
+        strategy: Optional[str] = "highest_ally",
+    ):
         self.name = name
         self.client = client
         self.private_id: Optional[str] = None
         self.score: int = 0
+        # "highest_ally" is also implemented by the server's take_turn_auto
+        # tool, which reads the status, picks the target and registers the
+        # support in one call (server-side kernel fusion). Pass strategy=None
+        # to decide client-side with choose_support() instead.
+        self.strategy = strategy
+        # The canned negotiation message has no effect on scoring, so it is
+        # off by default and, when on, sent at most once per target per game.
+        self.negotiate = negotiate
+        self._messaged: Set[str] = set()
+        # Own generator for tie-breaks rather than the shared module-level one
+        self._rng = random.Random(hash(name))
 
     def register(self):
         result = self.client.call_tool("register_player", {"player_name": self.name})
@@ -94,12 +245,30 @@ class Participant:
         self.score = result["score"]
         print(f"Registered player {self.name} (private_id={self.private_id})")
 
+    def status_request(self) -> Dict[str, Any]:
+        if not self.private_id:
+            raise RuntimeError("Not registered")
+        return self.client.tool_request("get_status", {"private_id": self.private_id})
+
     def get_status(self) -> Dict[str, Any]:
+        status = self.client.call_tools([self.status_request()])[0]
+        self.score = status["score"]
+        return status
+
+    @property
+    def plays_on_server(self) -> bool:
+        # Negotiating needs the chosen target before the support is
+        # registered, so it stays on the manual path.
+        return self.strategy == "highest_ally" and not self.negotiate
+
+    def auto_turn_request(self) -> Dict[str, Any]:
         if not self.private_id:
             raise RuntimeError("Not registered")
-        result = self.client.call_tool("get_status", {"private_id": self.private_id})
-        self.score = result["score"]
-        return result
+        return self.client.tool_request("take_turn_auto", {"private_id": self.private_id})
+
+    def record_auto_turn(self, result: Dict[str, Any]) -> Optional[str]:
+        self.score = result["status"]["score"]
+        return result["chose"]
 
     def choose_support(self, status: Dict[str, Any]) -> Optional[str]:
         """
@@ -108,71 +277,82 @@ class Participant:
         - Otherwise, support the highest-scoring other player.
         Replace this with a call to an OpenAI model if you like.
         """
-        others: List[Dict[str, Any]] = status.get("other_players", [])
-        if not others:
-            return None
-
-        # First try: allies from last round
-        allies = [
-            p for p in others if p.get("supported_you_last_round")
-        ]
-        candidates = allies or others
-
-        # Pick highest score, break ties randomly
-        max_score = max(p["score"] for p in candidates)
-        best = [p for p in candidates if p["score"] == max_score]
-        target = random.choice(best)["player_name"]
-        return target
+        return _pick_target(status.get("other_players", ()), self._rng)
 
-    def play_turn(self):
-        status = self.get_status()
+    def turn_requests(self, status: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Decide this turn from `status` and return the tool calls to make.
+        """
+        self.score = status["score"]
         target = self.choose_support(status)
         if target is None:
-            return
+            return []
+
+        calls = []
 
         # Optionally send a negotiation message
-        self.client.call_tool(
-            "send_message",
-            {
-                "private_id": self.private_id,
-                "recipient_player_name": target,
-                "message": f"Let's mutually support each other this round. - {self.name}",
-            },
-        )
+        if self.negotiate and target not in self._messaged:
+            self._messaged.add(target)
+            calls.append(
+                self.client.tool_request(
+                    "send_message",
+                    {
+                        "private_id": self.private_id,
+                        "recipient_player_name": target,
+                        "message": f"Let's mutually support each other this round. - {self.name}",
+                    },
+                )
+            )
 
         # Register support choice
-        self.client.call_tool(
-            "register_support",
-            {
-                "private_id": self.private_id,
-                "player_to_support": target,
-            },
+        calls.append(
+            self.client.tool_request(
+                "register_support",
+                {
+                    "private_id": self.private_id,
+                    "player_to_support": target,
+                },
+            )
         )
+        return calls
+
+    def play_turn(self):
+        if self.plays_on_server:
+            self.record_auto_turn(self.client.call_tools([self.auto_turn_request()])[0])
+        else:
+            self.client.call_tools(self.turn_requests(self.get_status()))
 
 
 def print_scoreboard(board: Dict[str, Any]):
+    # Built as one string and written once: a single stdout write/flush
+    # instead of one print per line.
     round_number = board["round_number"]
-    print(f"\n=== SCOREBOARD AFTER ROUND {round_number} ===")
+    lines = [f"\n=== SCOREBOARD AFTER ROUND {round_number} ==="]
     for entry in board["scores"]:
         supported = entry.get("supported")
-        supporters = entry.get("supporters_this_round", [])
-        supporters_str = ", ".join(supporters) if supporters else "none"
-        print(
+        supporters_str = ", ".join(entry.get("supporters_this_round", ())) or "none"
+        lines.append(
             f"- {entry['player_name']}: {entry['score']} points | "
             f"supported: {supported or 'no one'} | "
             f"supporters: {supporters_str}"
         )
-    print("======================================")
+    lines.append("======================================\n")
+    sys.stdout.write("\n".join(lines))
+    sys.stdout.flush()
 
 
 def main():
-    client = MCPClient(SERVER_URL)
+    # All participants share this client, and each round's calls go out as
+    # sequential batches, so at most one request is in flight at a time.
+    concurrency = 1
+    client = MCPClient(SERVER_URL, pool_maxsize=concurrency)
     init_info = client.initialize()
     server_name = init_info.get("serverInfo", {}).get("name", "unknown")
     print(f"Connected to MCP server: {server_name}")
     print(f"Using endpoint: {SERVER_URL}")
 
-    # Create 4 participants
+    # Create 4 participants. With the defaults they all play on the server;
+    # negotiate=True or strategy=None players take the manual path below.
     names = ["Alpha", "Bravo", "Charlie", "Delta"]
     participants = [Participant(name, client) for name in names]
 
@@ -184,15 +364,26 @@ def main():
     NUM_ROUNDS = 10
     for r in range(1, NUM_ROUNDS + 1):
         print(f"\n===== ROUND {r} =====")
-        # Each participant takes an action
-        for p in participants:
-            p.play_turn()
+        # Server-side players take their whole turn in one take_turn_auto
+        # call. Manual players fetch their status in one batch first, and
+        # their actions then join the same batch as the automatic turns.
+        auto = [p for p in participants if p.plays_on_server]
+        manual = [p for p in participants if not p.plays_on_server]
+        actions = [p.auto_turn_request() for p in auto]
+        if manual:
+            statuses = client.call_tools([p.status_request() for p in manual])
+            for p, status in zip(manual, statuses):
+                actions.extend(p.turn_requests(status))
+        results = client.call_tools(actions)
+        for p, result in zip(auto, results):
+            p.record_auto_turn(result)
 
         # Admin: advance round and print scoreboard
         board = client.call_method("game/advance_round", {})
         print_scoreboard(board)
 
     print("\nGame over.")
+    client.close()
 
 
 if __name__ == "__main__":
@@ -1,27 +1,71 @@
 import asyncio
+import json
 import os
+from typing import Optional
 from agents import Agent, Runner, SQLiteSession
 from agents.mcp import MCPServerStreamableHttp
 
 
 MODEL = "gpt-5-nano"
-PARAMS = {"url": os.getenv("ALLIANCE_MCP_SERVER"), "timeout": 30}
+# timeout covers connect/write; reads on the streaming connection get their
+# own long timeout so the idle gap between turns never forces a reconnect.
+# Individual calls are still bounded by SESSION_TIMEOUT below.
+PARAMS = {"url": os.getenv("ALLIANCE_MCP_SERVER"), "timeout": 10, "sse_read_timeout": 3600}
+# wait_next_round long-polls for up to 25 s by default, so MCP calls need a
+# longer read timeout than the SDK's 5 s default
+SESSION_TIMEOUT = 35
+POLL_INTERVAL = 2
 
 INSTRUCTIONS = "Play the Alliance game. Use your tools to check status, send messages, and choose who to support."
 REGISTER = "Come up with a random player name and register as that player"
 
 
+def _round_number(result) -> Optional[int]:
+    for item in result.content:
+        if getattr(item, "type", None) == "text":
+            return json.loads(item.text).get("round_number")
+    return None
+
+
+async def wait_for_next_round(mcp: MCPServerStreamableHttp, last_seen: Optional[int], **arguments) -> Optional[int]:
+    """
+    Block until the server starts a round after `last_seen` and return the
+    round number it reports. Passing the last seen round (rather than waiting
+    for the one after whatever is current) means a round that started while
+    our turn was running is played straight away instead of slept through.
+    Servers without the wait_next_round tool fall back to polling every
+    POLL_INTERVAL seconds.
+    """
+    if last_seen is not None:
+        arguments["round_number"] = last_seen
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        result = await mcp.call_tool("wait_next_round", arguments)
+        if not result.isError:
+            return _round_number(result)
+        print(f"wait_next_round returned an error: {result.content}")
+    except Exception as e:
+        print(f"wait_next_round failed: {e!r}")
+    await asyncio.sleep(max(0.0, POLL_INTERVAL - (loop.time() - started)))
+    return last_seen
+
+
 async def main():
-    session = SQLiteSession("Simple")
-    async with MCPServerStreamableHttp(params=PARAMS) as mcp:
+    # The game is short-lived, so conversation memory stays in memory rather
+    # than in a database file
+    session = SQLiteSession("Simple", ":memory:")
+    async with MCPServerStreamableHttp(params=PARAMS, client_session_timeout_seconds=SESSION_TIMEOUT) as mcp:
         agent = Agent(name="Simple", instructions=INSTRUCTIONS, model=MODEL, mcp_servers=[mcp])
         await Runner.run(agent, REGISTER, session=session)
         print("Registered")
+        # A zero timeout just reports the round we are about to play
+        round_number = await wait_for_next_round(mcp, None, timeout_seconds=0)
         while True:
             print("=== TURN ===")
             await Runner.run(agent, "Check status and take action", session=session)
-            await asyncio.sleep(2)
+            round_number = await wait_for_next_round(mcp, round_number)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())